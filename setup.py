@@ -1,9 +1,9 @@
 #!/usr/bin/env python
 
 import os
-from importlib.util import module_from_spec, spec_from_file_location
+import re
+from functools import lru_cache
 
-from pkg_resources import parse_requirements
 from setuptools import find_packages, setup
 
 _PATH_ROOT = os.path.dirname(__file__)
@@ -11,16 +11,17 @@ _PATH_SOURCE = os.path.join(_PATH_ROOT, "src")
 _PATH_README = os.path.join(_PATH_ROOT, "README.md")
 
 
-def _load_py_module(fname, pkg="lightning_hivemind"):
-    spec = spec_from_file_location(os.path.join(pkg, fname), os.path.join(_PATH_SOURCE, pkg, fname))
-    py = module_from_spec(spec)
-    spec.loader.exec_module(py)
-    return py
+def _load_about(fname: str = "__about__.py", pkg: str = "lightning_hivemind") -> dict:
+    # read the plain string constants instead of executing the module
+    with open(os.path.join(_PATH_SOURCE, pkg, fname)) as fp:
+        return dict(re.findall(r"^__(\w+)__\s*=\s*[\"'](.+)[\"']", fp.read(), re.M))
 
 
-def _load_requirements(path_dir: str, file_name: str = "requirements.txt") -> list:
-    reqs = parse_requirements(open(os.path.join(path_dir, file_name)).readlines())
-    return list(map(str, reqs))
+@lru_cache(maxsize=None)
+def _load_requirements(path_dir: str, file_name: str = "requirements.txt") -> tuple:
+    with open(os.path.join(path_dir, file_name)) as fp:
+        lines = [ln.split("#", 1)[0].strip() for ln in fp.readlines()]
+    return tuple(ln for ln in lines if ln)
 
 
 def _load_readme(path_readme: str = _PATH_README) -> str:
@@ -28,7 +29,7 @@ def _load_readme(path_readme: str = _PATH_README) -> str:
         return fp.read()
 
 
-about = _load_py_module("__about__.py")
+about = _load_about()
 
 # https://packaging.python.org/discussions/install-requires-vs-requirements /
 # keep the meta-data here for simplicity in reading this file... it's not obvious
@@ -37,13 +38,13 @@ about = _load_py_module("__about__.py")
 # engineer specific practices
 setup(
     name="lightning-Hivemind",
-    version=about.__version__,
-    description=about.__docs__,
-    author=about.__author__,
-    author_email=about.__author_email__,
-    url=about.__homepage__,
+    version=about["version"],
+    description=about["docs"],
+    author=about["author"],
+    author_email=about["author_email"],
+    url=about["homepage"],
     download_url="https://github.com/Lightning-AI/lightning-Hivemind",
-    license=about.__license__,
+    license=about["license"],
     packages=find_packages(where="src"),
     package_dir={"": "src"},
     long_description=_load_readme(),
@@ -53,7 +54,7 @@ setup(
     keywords=["deep learning", "pytorch", "AI"],
     python_requires=">=3.8",
     setup_requires=["wheel"],
-    install_requires=_load_requirements(_PATH_ROOT),
+    install_requires=list(_load_requirements(_PATH_ROOT)),
     project_urls={
         "Bug Tracker": "https://github.com/Lightning-AI/lightning-Hivemind/issues",
         "Documentation": "https://lightning-Hivemind.rtfd.io/en/latest/",
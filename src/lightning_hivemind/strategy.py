@@ -12,19 +12,30 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import ipaddress
 import logging
 import os
-import platform
-from typing import Any, Callable, Dict, List, Optional, Union
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-import hivemind
 import torch
 from lightning_utilities import module_available
 from torch import Tensor
 from torch.optim import Optimizer
 
-if module_available("lightning"):
+
+@functools.lru_cache(maxsize=None)
+def _lightning_backend() -> str:
+    # probe the installed packages once, ``find_spec`` walks ``sys.path`` on every call
+    if module_available("lightning"):
+        return "lightning"
+    if module_available("pytorch_lightning") and module_available("lightning_fabric"):
+        return "pytorch_lightning"
+    raise ModuleNotFoundError("You are missing `lightning` or `pytorch-lightning` package, please install it.")
+
+
+if _lightning_backend() == "lightning":
     from lightning.fabric.strategies.strategy import TBroadcast
     from lightning.fabric.utilities.types import LRScheduler, ReduceLROnPlateau
     from lightning.pytorch import Trainer
@@ -33,7 +44,7 @@ if module_available("lightning"):
     from lightning.pytorch.utilities.exceptions import MisconfigurationException
     from lightning.pytorch.utilities.model_helpers import is_overridden
     from lightning.pytorch.utilities.rank_zero import rank_zero_warn
-elif module_available("pytorch_lightning") and module_available("lightning_fabric"):
+else:
     from lightning_fabric.strategies.strategy import TBroadcast  # type: ignore[no-redef]
     from lightning_fabric.utilities.types import LRScheduler, ReduceLROnPlateau  # type: ignore[no-redef]
     from pytorch_lightning import Trainer  # type: ignore[assignment]
@@ -42,11 +53,26 @@ elif module_available("pytorch_lightning") and module_available("lightning_fabri
     from pytorch_lightning.utilities.exceptions import MisconfigurationException
     from pytorch_lightning.utilities.model_helpers import is_overridden
     from pytorch_lightning.utilities.rank_zero import rank_zero_warn
-else:
-    raise ModuleNotFoundError("You are missing `lightning` or `pytorch-lightning` package, please install it.")
+
+# `hivemind` is imported lazily where needed: it is only installable on Linux and pulls in its whole p2p stack
+if TYPE_CHECKING:
+    import hivemind
 
 log = logging.getLogger(__name__)
 
+_LOOPBACK_HOSTS = frozenset(("127.0.0.1", "::1"))
+
+
+def _is_loopback(host: str) -> bool:
+    # short-circuit the loopback hosts DHT peers commonly report, ``ip_address`` parsing is slow pure Python
+    if host in _LOOPBACK_HOSTS:
+        return True
+    return ipaddress.ip_address(host).is_loopback
+
+
+def _noop(*args: Any, **kwargs: Any) -> None:
+    return None
+
 
 class HivemindStrategy(Strategy):
     """Provides capabilities to train with Hivemind, collaboratively across the internet with unreliable machines.
@@ -124,6 +150,24 @@ class HivemindStrategy(Strategy):
         **optimizer_kwargs: kwargs are passed to the :class:`hivemind.Optimizer` class.
     """
 
+    # the base ``Strategy`` does not define ``__slots__``, so instances keep a ``__dict__`` (needed by the cached
+    # ``root_device``) while the attributes below get fixed slots
+    __slots__ = (
+        "_initial_peers",
+        "_target_batch_size",
+        "_batch_size",
+        "_scheduler_fn",
+        "_require_scheduler_fn",
+        "_opt",
+        "_tracker",
+        "_optimizer_zero_grad_original",
+        "_run_id",
+        "_reuse_grad_buffers",
+        "_optimizer_kwargs",
+        "dht",
+        "_hivemind_initialized",
+    )
+
     INITIAL_PEERS_ENV: str = "PL_INITIAL_PEERS"
     optimizers: List[Optimizer]
 
@@ -152,40 +196,49 @@ class HivemindStrategy(Strategy):
         identity_path: Optional[str] = None,
         **optimizer_kwargs: Any,
     ):
-        if platform.system() != "Linux":
+        if not sys.platform.startswith("linux"):
             raise MisconfigurationException(
                 "To use the `HivemindStrategy`, you must have Hivemind installed and be running on Linux."
                 " Install it by running `pip install -U hivemind`."
             )
 
+        import hivemind
+
         super().__init__()
-        self._initial_peers = initial_peers
+        peers = os.environ.get(self.INITIAL_PEERS_ENV, initial_peers)
+        self._initial_peers: Optional[Tuple[Any, ...]]
+        if isinstance(peers, str):
+            self._initial_peers = tuple(peer.strip() for peer in peers.split(",") if peer.strip())
+        else:
+            self._initial_peers = tuple(peers) if peers is not None else None
         self._target_batch_size = target_batch_size
         self._batch_size = batch_size
         self._scheduler_fn = scheduler_fn
         self._require_scheduler_fn = delay_optimizer_step or delay_state_averaging or offload_optimizer
         self._opt = None
+        self._tracker = None
         self._optimizer_zero_grad_original: Optional[Callable] = None
         self._run_id = run_id
         self._reuse_grad_buffers = reuse_grad_buffers
-        self._optimizer_kwargs = dict(
-            matchmaking_time=matchmaking_time,
-            averaging_timeout=averaging_timeout,
-            delay_optimizer_step=delay_optimizer_step,
-            delay_state_averaging=delay_state_averaging,
-            delay_grad_averaging=delay_grad_averaging,
-            offload_optimizer=offload_optimizer,
-            averager_opts=averager_opts if averaging_timeout is not None else {"request_timeout": 1.0},
-            verbose=verbose,
-            reuse_grad_buffers=reuse_grad_buffers,
+        self._optimizer_kwargs = {
+            "matchmaking_time": matchmaking_time,
+            "averaging_timeout": averaging_timeout,
+            "delay_optimizer_step": delay_optimizer_step,
+            "delay_state_averaging": delay_state_averaging,
+            "delay_grad_averaging": delay_grad_averaging,
+            "offload_optimizer": offload_optimizer,
+            "averager_opts": averager_opts if averager_opts is not None else {"request_timeout": 1.0},
+            "verbose": verbose,
+            "reuse_grad_buffers": reuse_grad_buffers,
             **optimizer_kwargs,
-        )
-
-        self._parse_env_initial_peers()
+        }
 
+        # the DHT daemon bootstraps in its own process, we only wait for it before the optimizer is created so that
+        # the handshake overlaps with the rest of the trainer setup
         self.dht = hivemind.DHT(
             start=True,
-            initial_peers=initial_peers,
+            await_ready=False,
+            initial_peers=self._initial_peers,
             host_maddrs=host_maddrs if host_maddrs is not None else ["/ip4/0.0.0.0/tcp/0", "/ip4/0.0.0.0/udp/0/quic"],
             use_ipfs=use_ipfs,
             ensure_bootstrap_success=True,
@@ -196,33 +249,34 @@ class HivemindStrategy(Strategy):
             identity_path=identity_path,
         )
 
-        visible_addresses = [
-            str(a) for a in self.dht.get_visible_maddrs() if not ipaddress.ip_address(a.values()[0]).is_loopback
-        ]
+        self._hivemind_initialized = False
 
-        if initial_peers is None:
+    def _wait_for_dht(self) -> None:
+        # raises if the bootstrap failed in the DHT process
+        self.dht.wait_until_ready()
+
+        if self._initial_peers is None and log.isEnabledFor(logging.INFO):
+            peers = ",".join(str(a) for a in self.dht.get_visible_maddrs() if not _is_loopback(a.values()[0]))
             log.info(
                 "\nOther machines can connect running the same command:\n"
-                f"INITIAL_PEERS={','.join(visible_addresses)} python ...\n"
+                "INITIAL_PEERS=%s python ...\n"
                 "or passing the peers to the strategy:\n"
-                f"HivemindStrategy(initial_peers='{','.join(visible_addresses)}')"
+                "HivemindStrategy(initial_peers='%s')",
+                peers,
+                peers,
             )
 
-        self._hivemind_initialized = False
-
-    def _parse_env_initial_peers(self) -> None:
-        initial_peers = os.environ.get(self.INITIAL_PEERS_ENV, self._initial_peers)
-        self._initial_peers = initial_peers.split(",") if isinstance(initial_peers, str) else self._initial_peers
-
     @property
     def num_peers(self) -> int:
-        if self._opt:
-            return self._opt.tracker.global_progress.num_peers
+        if self._tracker is not None:
+            return self._tracker.global_progress.num_peers
         return 1
 
-    @property
+    @functools.cached_property
     def root_device(self) -> torch.device:
-        if module_available("lightning"):
+        # cached as Lightning reads it every step, the accelerator is attached once by the trainer before the first
+        # access. Raising below leaves the cache empty
+        if _lightning_backend() == "lightning":
             from lightning.pytorch.accelerators import CPUAccelerator, CUDAAccelerator
         else:
             from pytorch_lightning.accelerators import CPUAccelerator, CUDAAccelerator
@@ -244,12 +298,16 @@ class HivemindStrategy(Strategy):
         return True
 
     def setup(self, trainer: Trainer) -> None:
+        import hivemind
+
         self.model_to_device()
         super().setup(trainer)
         if self.precision_plugin.precision == "16":
             self.precision_plugin.scaler = hivemind.GradScaler()
 
     def _initialize_hivemind(self) -> None:
+        import hivemind
+
         if len(self.optimizers) > 1:
             raise MisconfigurationException("Hivemind only supports training with one optimizer.")
         optimizer = self.optimizers[0]
@@ -261,6 +319,8 @@ class HivemindStrategy(Strategy):
                 "(this is because the optimizer is re-created within Hivemind)."
             )
 
+        self._wait_for_dht()
+
         scheduler = self._scheduler_fn if self._require_scheduler_fn else None
         params = optimizer.param_groups if self._require_scheduler_fn else None
         optimizer = type(optimizer) if self._require_scheduler_fn else optimizer
@@ -280,6 +340,7 @@ class HivemindStrategy(Strategy):
         opt.load_state_from_peers()
         self.optimizers = [opt]
         self._opt = opt
+        self._tracker = opt.tracker
 
         if self._reuse_grad_buffers:
             assert self.lightning_module is not None
@@ -316,7 +377,7 @@ class HivemindStrategy(Strategy):
             if self._batch_size is None:
                 try:
                     self._batch_size = extract_batch_size(batch)
-                    log.info(f"Found per machine batch size automatically from the batch: {self._batch_size}")
+                    log.info("Found per machine batch size automatically from the batch: %s", self._batch_size)
                 except (MisconfigurationException, RecursionError) as err:
                     raise MisconfigurationException(
                         "We tried to infer the batch size from the first batch of data. "
@@ -324,6 +385,8 @@ class HivemindStrategy(Strategy):
                         "``Trainer(strategy=HivemindStrategy(batch_size=x))``. "
                     ) from err
             self._initialize_hivemind()
+            # nothing is left to do on the following batches, shadow this hook with a no-op on the instance
+            self.on_train_batch_start = _noop  # type: ignore[method-assign]
 
     def reduce(self, tensor: Union[Any, Tensor], *args: Any, **kwargs: Any) -> Union[Any, Tensor]:
         return tensor
@@ -361,17 +424,31 @@ class HiveMindScheduler:
     This code ensures that we only step when the HiveMind optimizer reaches the global step.
     """
 
+    __slots__ = ("optimizer", "scheduler", "current_step")
+
     base_lrs: List[float]
 
     def __init__(self, optimizer: "hivemind.Optimizer", scheduler: LRScheduler) -> None:
-        # copy most of the `Scheduler` methods into this instance. `__del__` is skipped in case the scheduler has
-        # implemented custom logic which we would not want to call on destruction of the `HiveMindScheduler`
-        self.__dict__ = {k: v for k, v in scheduler.__dict__.items() if k not in ("step", "__del__")}
-
         self.optimizer = optimizer
         self.scheduler = scheduler
         self.current_step = -1
 
+    def __getattr__(self, name: str) -> Any:
+        """Read any other attribute from the wrapped scheduler instead of copying its state into this instance.
+
+        ``scheduler`` itself is excluded to avoid recursing while the slot is unset (e.g. when unpickling).
+        """
+        if name == "scheduler":
+            raise AttributeError(name)
+        return getattr(self.scheduler, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Write any attribute other than the wrapper's own slots to the wrapped scheduler, mirroring reads."""
+        if name in HiveMindScheduler.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.scheduler, name, value)
+
     def step(self, epoch: Optional[int] = None) -> None:
         while self.current_step < self.optimizer.local_epoch:
             self.scheduler.step(epoch=epoch)
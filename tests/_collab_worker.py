@@ -0,0 +1,48 @@
+"""The collaborative training worker, kept out of the test module so it is only imported when it is run."""
+
+import time
+from typing import Any
+
+from _lightning_compat import STEP_OUTPUT, BoringModel, Trainer
+
+from lightning_hivemind.strategy import HivemindStrategy
+
+
+def _run_collab_training_fn(
+    initial_peers, num_processes, wait_seconds, barrier, recorded_process_peers, recorded_process_steps
+):
+    recorded_peers = []
+    recorded_global_steps = []
+
+    class TestModel(BoringModel):
+        def on_train_batch_end(self, outputs: STEP_OUTPUT, batch: Any, batch_idx: int, unused: int = 0) -> None:
+            # give the progress tracker up to `wait_seconds` per batch to see all the peers
+            deadline = time.monotonic() + wait_seconds
+            while self.trainer.strategy.num_peers < num_processes and time.monotonic() < deadline:
+                time.sleep(0.01)
+            recorded_peers.append(self.trainer.strategy.num_peers)
+            recorded_global_steps.append(self.trainer.optimizers[0].local_epoch)
+
+        def on_train_end(self) -> None:
+            # wait for all processes to get to the end of training before teardown
+            barrier.wait()
+
+    model = TestModel()
+    trainer = Trainer(
+        max_epochs=1,
+        limit_train_batches=16,
+        limit_val_batches=0,
+        strategy=HivemindStrategy(
+            delay_state_averaging=True,
+            offload_optimizer=True,
+            delay_optimizer_step=True,
+            delay_grad_averaging=True,
+            target_batch_size=8,
+            initial_peers=initial_peers,
+            verbose=False,
+        ),
+    )
+    trainer.fit(model)
+
+    recorded_process_peers.append(recorded_peers)
+    recorded_process_steps.append(recorded_global_steps)
@@ -0,0 +1,20 @@
+"""The Lightning names used by the tests, resolved once with the same cached probe as the strategy."""
+
+from lightning_hivemind.strategy import _lightning_backend
+
+if _lightning_backend() == "lightning":
+    from lightning.pytorch import Trainer
+    from lightning.pytorch.demos.boring_classes import BoringModel
+    from lightning.pytorch.utilities.exceptions import MisconfigurationException
+    from lightning.pytorch.utilities.types import STEP_OUTPUT
+
+    PL_PACKAGE = "lightning.pytorch"
+else:
+    from pytorch_lightning import Trainer  # type: ignore[assignment]
+    from pytorch_lightning.demos.boring_classes import BoringModel  # type: ignore[assignment]
+    from pytorch_lightning.utilities.exceptions import MisconfigurationException  # type: ignore[assignment]
+    from pytorch_lightning.utilities.types import STEP_OUTPUT  # type: ignore[assignment]
+
+    PL_PACKAGE = "pytorch_lightning"
+
+__all__ = ["PL_PACKAGE", "STEP_OUTPUT", "BoringModel", "MisconfigurationException", "Trainer"]
@@ -0,0 +1,32 @@
+import os
+from functools import lru_cache
+
+import pytest
+
+
+@lru_cache(maxsize=None)
+def _cuda_ok() -> bool:
+    """Probe CUDA once per session, without touching the driver when all devices are hidden."""
+    if os.environ.get("CUDA_VISIBLE_DEVICES") == "":
+        return False
+    import torch
+
+    return torch.cuda.is_available()
+
+
+def pytest_collection_modifyitems(config, items):
+    if not any("gpu" in item.keywords for item in items) or _cuda_ok():
+        return
+    skip = pytest.mark.skip(reason="This test needs at least single GPU.")
+    for item in items:
+        if "gpu" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _hivemind_env():
+    """Set the environment shared by all tests once, leaving the rest of ``os.environ`` intact."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("HIVEMIND_MEMORY_SHARING_STRATEGY", "file_descriptor")
+        monkeypatch.delenv("PL_INITIAL_PEERS", raising=False)
+        yield
@@ -1,291 +1,372 @@
-import multiprocessing as mp
-import os
-import time
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Iterator
 from unittest import mock
-from unittest.mock import PropertyMock
 
 import hivemind
 import pytest
 import torch
-from lightning_utilities import module_available
-from torch import Tensor
+from _lightning_compat import PL_PACKAGE, BoringModel, MisconfigurationException, Trainer
 from torch.optim import Optimizer
 
-if module_available("lightning"):
-    from lightning.pytorch import Trainer
-    from lightning.pytorch.demos.boring_classes import BoringModel
-    from lightning.pytorch.utilities.exceptions import MisconfigurationException
-    from lightning.pytorch.utilities.types import STEP_OUTPUT
+from lightning_hivemind.strategy import HiveMindScheduler, HivemindStrategy, _is_loopback
 
-    PL_PACKAGE = "lightning.pytorch"
-elif module_available("pytorch_lightning"):
-    from pytorch_lightning import Trainer
-    from pytorch_lightning.demos.boring_classes import BoringModel
-    from pytorch_lightning.utilities.exceptions import MisconfigurationException
-    from pytorch_lightning.utilities.types import STEP_OUTPUT
 
-    PL_PACKAGE = "pytorch_lightning"
-else:
-    raise ModuleNotFoundError("You are missing `lightning` or `pytorch-lightning` package, please install it.")
+class _DHTSpec:
+    """The part of ``hivemind.DHT`` used by the strategy, a cheap spec compared to autospeccing the whole class."""
 
-from lightning_hivemind.strategy import HiveMindScheduler, HivemindStrategy
+    kwargs = None
 
+    def get_visible_maddrs(self): ...
 
-@mock.patch("hivemind.DHT", autospec=True)
+    def wait_until_ready(self, timeout=None): ...
+
+    def shutdown(self): ...
+
+
+@pytest.fixture(scope="module")
+def shared_dht():
+    dht = hivemind.DHT(start=True)
+    yield dht
+    dht.shutdown()
+
+
+@pytest.fixture
+def reuse_shared_dht(shared_dht):
+    """Make the strategies created in a test use the module's DHT instead of each starting their own daemon."""
+    with mock.patch("hivemind.DHT", return_value=shared_dht), mock.patch.object(shared_dht, "shutdown"):
+        yield shared_dht
+
+
+def _fast_trainer(strategy: HivemindStrategy, **kwargs: Any) -> Trainer:
+    """Create a ``Trainer`` running a single training batch, without logger, callbacks or validation."""
+    trainer_kwargs = {
+        "max_epochs": 1,
+        "limit_train_batches": 1,
+        "limit_val_batches": 0,
+        "num_sanity_val_steps": 0,
+        "logger": False,
+        "enable_checkpointing": False,
+        "enable_progress_bar": False,
+        "enable_model_summary": False,
+        **kwargs,
+    }
+    return Trainer(strategy=strategy, **trainer_kwargs)
+
+
+@contextmanager
+def _initialized_strategy(strategy: HivemindStrategy, model: BoringModel) -> Iterator[Trainer]:
+    """Wrap the optimizers as on the first training batch, without running a training loop."""
+    trainer = _fast_trainer(strategy)
+    model.trainer = trainer
+    strategy.connect(model)
+    strategy.setup_optimizers(trainer)
+    strategy.on_train_batch_start(torch.randn(1, 32), batch_idx=0)
+    try:
+        yield trainer
+    finally:
+        strategy.teardown()
+
+
+def _make_fake_optimizer(optimizer: Optimizer) -> Optimizer:
+    """Stand in for a ``hivemind.Optimizer`` with a plain torch optimizer, skipping the averagers."""
+    optimizer.local_epoch = 0
+    optimizer.load_state_from_peers = mock.Mock()
+    optimizer.shutdown = mock.Mock()
+    optimizer.tracker = mock.Mock()
+    return optimizer
+
+
+class _ExponentialLRModel(BoringModel):
+    def configure_optimizers(self):
+        optimizer = torch.optim.SGD(self.layer.parameters(), lr=0.1)
+        return [optimizer], [torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=0.9)]
+
+
+class _AssertWrappedModel(_ExponentialLRModel):
+    def __init__(self) -> None:
+        super().__init__()
+        self.trained_batches = 0
+
+    def on_train_batch_end(self, outputs: Any, batch: Any, batch_idx: int) -> None:
+        assert isinstance(self.trainer.optimizers[0], hivemind.Optimizer)
+        assert isinstance(self.trainer.lr_scheduler_configs[0].scheduler, HiveMindScheduler)
+        self.trained_batches += 1
+
+
+class _ZeroGradOverrideModel(BoringModel):
+    def optimizer_zero_grad(self, epoch: int, batch_idx: int, optimizer: Optimizer, optimizer_idx: int):
+        pass
+
+
+class _MultipleOptimizersModel(BoringModel):
+    def configure_optimizers(self):
+        optimizer = torch.optim.SGD(self.layer.parameters(), lr=0.1)
+        lr_scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=1)
+        return [optimizer, optimizer], [lr_scheduler]
+
+
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
 def test_strategy(mock_dht):
     strategy = HivemindStrategy(target_batch_size=1)
     trainer = Trainer(strategy=strategy)
     assert trainer.strategy == strategy
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
+def test_collectives_are_noops(mock_dht):
+    strategy = HivemindStrategy(target_batch_size=1)
+    tensor = torch.ones(1)
+    assert strategy.reduce(tensor, reduce_op="mean") is tensor
+    assert strategy.all_gather(tensor, sync_grads=True) is tensor
+    assert strategy.broadcast(tensor, src=0) is tensor
+    assert strategy.barrier("name") is None
+
+
+@pytest.mark.usefixtures("reuse_shared_dht")
 def test_optimizer_wrapped():
-    class TestModel(BoringModel):
-        def on_before_backward(self, loss: Tensor) -> None:
-            optimizer = self.trainer.optimizers[0]
-            assert isinstance(optimizer, hivemind.Optimizer)
+    strategy = HivemindStrategy(target_batch_size=1)
+    with _initialized_strategy(strategy, BoringModel()):
+        assert isinstance(strategy.optimizers[0], hivemind.Optimizer)
 
-    model = TestModel()
-    trainer = Trainer(strategy=HivemindStrategy(target_batch_size=1), fast_dev_run=True)
-    trainer.fit(model)
 
+@pytest.mark.usefixtures("reuse_shared_dht")
+def test_fit_wraps_optimizer_and_scheduler():
+    """Test that a training step runs end to end with the hivemind optimizer and the wrapped scheduler."""
+    model = _AssertWrappedModel()
+    _fast_trainer(HivemindStrategy(target_batch_size=1)).fit(model)
+    assert model.trained_batches == 1
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
+
+@pytest.mark.usefixtures("reuse_shared_dht")
 def test_scheduler_wrapped():
-    class TestModel(BoringModel):
-        def on_before_backward(self, loss: Tensor) -> None:
-            scheduler = self.trainer.lr_scheduler_configs[0].scheduler
-            assert isinstance(scheduler, HiveMindScheduler)
+    strategy = HivemindStrategy(target_batch_size=1)
+    with _initialized_strategy(strategy, _ExponentialLRModel()):
+        assert isinstance(strategy.lr_scheduler_configs[0].scheduler, HiveMindScheduler)
 
-        def configure_optimizers(self):
-            optimizer = torch.optim.SGD(self.layer.parameters(), lr=0.1)
-            return [optimizer], [torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=0.9)]
 
-    model = TestModel()
-    trainer = Trainer(
-        strategy=HivemindStrategy(target_batch_size=1),
-        fast_dev_run=True,
-    )
-    trainer.fit(model)
+def test_ipfs_integration():
+    strategy = HivemindStrategy(target_batch_size=1, use_ipfs=True, use_relay=True, use_auto_relay=True)
+    with _initialized_strategy(strategy, _ExponentialLRModel()):
+        assert isinstance(strategy.lr_scheduler_configs[0].scheduler, HiveMindScheduler)
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
-def test_ipfs_integration():
-    class TestModel(BoringModel):
-        def on_before_backward(self, loss: Tensor) -> None:
-            scheduler = self.trainer.lr_scheduler_configs[0].scheduler
-            assert isinstance(scheduler, HiveMindScheduler)
+def test_scheduler_wrapper_reads_from_scheduler():
+    """Test that the scheduler wrapper does not copy the scheduler state but reads and writes it on the scheduler."""
+    optimizer = torch.optim.SGD(torch.nn.Linear(1, 1).parameters(), lr=0.1)
+    scheduler = torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=0.9)
+    wrapped = HiveMindScheduler(optimizer=mock.Mock(local_epoch=0), scheduler=scheduler)
+    assert wrapped.base_lrs == [0.1]
+    scheduler.base_lrs = [0.2]
+    assert wrapped.base_lrs == [0.2]
 
-        def configure_optimizers(self):
-            optimizer = torch.optim.SGD(self.layer.parameters(), lr=0.1)
-            return [optimizer], [torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=0.9)]
+    wrapped.step()
+    assert wrapped.last_epoch == scheduler.last_epoch == 1
+    assert wrapped.get_last_lr() == scheduler.get_last_lr()
 
-    model = TestModel()
-    trainer = Trainer(
-        strategy=HivemindStrategy(target_batch_size=1, use_ipfs=True, use_relay=True, use_auto_relay=True),
-        fast_dev_run=True,
-    )
-    trainer.fit(model)
+    wrapped.last_epoch = 3
+    assert scheduler.last_epoch == 3
 
 
-@mock.patch.dict(
-    os.environ,
-    {
-        "HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor",
-        "PL_INITIAL_PEERS": "TEST_PEERS",
-    },
-    clear=True,
-)
-@mock.patch("hivemind.DHT", autospec=True)
-def test_env_variables_parsed(mock_dht):
+def test_scheduler_wrapper_catches_up_with_chained_schedulers():
+    """Test that lagging schedulers sharing one optimizer catch up to the same lr as stepping them together."""
+
+    def make_schedulers():
+        optimizer = torch.optim.SGD(torch.nn.Linear(1, 1).parameters(), lr=0.1)
+        return optimizer, [
+            torch.optim.lr_scheduler.ExponentialLR(optimizer, gamma=0.9),
+            torch.optim.lr_scheduler.StepLR(optimizer, step_size=2, gamma=0.5),
+        ]
+
+    optimizer, schedulers = make_schedulers()
+    hivemind_optimizer = mock.Mock(local_epoch=5)
+    optimizer.step()
+    for scheduler in schedulers:
+        HiveMindScheduler(optimizer=hivemind_optimizer, scheduler=scheduler).step()
+
+    expected_optimizer, expected_schedulers = make_schedulers()
+    for _ in range(6):
+        expected_optimizer.step()
+        for scheduler in expected_schedulers:
+            scheduler.step()
+    assert optimizer.param_groups[0]["lr"] == pytest.approx(expected_optimizer.param_groups[0]["lr"])
+
+
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
+def test_env_variables_parsed(mock_dht, monkeypatch):
     """Test that env variables are parsed correctly."""
+    monkeypatch.setenv("PL_INITIAL_PEERS", "TEST_PEERS")
     strategy = HivemindStrategy(target_batch_size=1)
-    assert strategy._initial_peers == ["TEST_PEERS"]
+    assert strategy._initial_peers == ("TEST_PEERS",)
+    assert mock_dht.call_args.kwargs["initial_peers"] == ("TEST_PEERS",)
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
-def test_reuse_grad_buffers_warning():
-    """Test to ensure we warn when a user overrides `optimizer_zero_grad` and `reuse_grad_buffers` is True."""
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
+def test_dht_awaited_before_optimizer(mock_dht):
+    """Test that the DHT bootstraps without blocking the constructor and is awaited before the optimizer is built."""
+    strategy = HivemindStrategy(target_batch_size=1)
+    assert mock_dht.call_args.kwargs["await_ready"] is False
+    mock_dht.return_value.wait_until_ready.assert_not_called()
 
-    class TestModel(BoringModel):
-        def on_before_backward(self, loss: Tensor) -> None:
-            optimizer = self.trainer.optimizers[0]
-            assert isinstance(optimizer, hivemind.Optimizer)
+    calls = mock.Mock()
+    calls.attach_mock(mock_dht.return_value.wait_until_ready, "wait_until_ready")
+    model = BoringModel()
+    with mock.patch("hivemind.Optimizer") as mock_optimizer:
+        calls.attach_mock(mock_optimizer, "optimizer")
+        mock_optimizer.return_value = _make_fake_optimizer(torch.optim.SGD(model.parameters(), lr=0.1))
+        with _initialized_strategy(strategy, model):
+            assert [name for name, _, _ in calls.mock_calls] == ["wait_until_ready", "optimizer"]
 
-        def optimizer_zero_grad(self, epoch: int, batch_idx: int, optimizer: Optimizer, optimizer_idx: int):
-            pass
 
-    model = TestModel()
-    trainer = Trainer(strategy=HivemindStrategy(target_batch_size=1, reuse_grad_buffers=True), fast_dev_run=True)
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
+def test_dht_bootstrap_error_raised_on_first_batch(mock_dht):
+    """Test that a failed DHT bootstrap surfaces when hivemind is initialized on the first batch."""
+    mock_dht.return_value.wait_until_ready.side_effect = RuntimeError("bootstrap failed")
+    strategy = HivemindStrategy(target_batch_size=1)
+    with pytest.raises(RuntimeError, match="bootstrap failed"), _initialized_strategy(strategy, BoringModel()):
+        pass
 
-    with pytest.warns(UserWarning, match="You have overridden `optimizer_zero_grad` which will be disabled."):
-        trainer.fit(model)
+
+@pytest.mark.usefixtures("reuse_shared_dht")
+def test_reuse_grad_buffers_warning():
+    """Test to ensure we warn when a user overrides `optimizer_zero_grad` and `reuse_grad_buffers` is True."""
+    strategy = HivemindStrategy(target_batch_size=1, reuse_grad_buffers=True)
+    match = "You have overridden `optimizer_zero_grad` which will be disabled."
+    with pytest.warns(UserWarning, match=match), _initialized_strategy(strategy, _ZeroGradOverrideModel()):
+        assert isinstance(strategy.optimizers[0], hivemind.Optimizer)
 
 
+@pytest.mark.usefixtures("reuse_shared_dht")
 @pytest.mark.xfail(
     raises=RuntimeError, reason="Training with multiple optimizers is only supported with manual optimization"
 )
 def test_raise_exception_multiple_optimizers():
     """Test that we raise an exception when multiple optimizers are provided."""
-
-    class TestModel(BoringModel):
-        def configure_optimizers(self):
-            optimizer = torch.optim.SGD(self.layer.parameters(), lr=0.1)
-            lr_scheduler = torch.optim.lr_scheduler.StepLR(optimizer, step_size=1)
-            return [optimizer, optimizer], [lr_scheduler]
-
-    model = TestModel()
-    trainer = Trainer(strategy=HivemindStrategy(target_batch_size=1), fast_dev_run=True)
+    model = _MultipleOptimizersModel()
+    trainer = _fast_trainer(HivemindStrategy(target_batch_size=1))
 
     with pytest.raises(MisconfigurationException, match="Hivemind only supports training with one optimizer."):
         trainer.fit(model)
 
 
+@pytest.mark.usefixtures("reuse_shared_dht")
 @mock.patch(f"{PL_PACKAGE}.utilities.data._extract_batch_size", autospec=True, return_value=[None])
 def test_raise_exception_no_batch_size(mock__extract_batch_size):
     """Test that we raise an exception when no batch size is automatically found."""
     model = BoringModel()
-    trainer = Trainer(strategy=HivemindStrategy(target_batch_size=1), fast_dev_run=True)
+    trainer = _fast_trainer(HivemindStrategy(target_batch_size=1))
 
     with pytest.raises(MisconfigurationException, match="Please provide the batch size to the Strategy."):
         trainer.fit(model)
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
+@pytest.mark.usefixtures("reuse_shared_dht")
 @pytest.mark.parametrize(
     ("delay_grad_averaging", "delay_state_averaging", "delay_optimizer_step"),
     [(True, True, True), (False, True, False)],
 )
 def test_warn_if_argument_passed(delay_grad_averaging, delay_state_averaging, delay_optimizer_step):
     """Ensure that valid combination of HiveMind delay arguments warn if scheduler isn't passed in as a function."""
-    model = BoringModel()
-    trainer = Trainer(
-        strategy=HivemindStrategy(
-            target_batch_size=1,
-            delay_grad_averaging=delay_grad_averaging,
-            delay_state_averaging=delay_state_averaging,
-            delay_optimizer_step=delay_optimizer_step,
-        ),
-        fast_dev_run=True,
+    strategy = HivemindStrategy(
+        target_batch_size=1,
+        delay_grad_averaging=delay_grad_averaging,
+        delay_state_averaging=delay_state_averaging,
+        delay_optimizer_step=delay_optimizer_step,
     )
+    optimizer = torch.optim.SGD(torch.nn.Linear(1, 1).parameters(), lr=0.1)
+    strategy.optimizers = [optimizer]
 
-    with pytest.warns(UserWarning, match="requires a `scheduler_fn` to be passed to the strategy"):
-        trainer.fit(model)
+    match = "requires a `scheduler_fn` to be passed to the strategy"
+    with mock.patch("hivemind.Optimizer", return_value=_make_fake_optimizer(optimizer)), pytest.warns(
+        UserWarning, match=match
+    ):
+        strategy._initialize_hivemind()
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
-@mock.patch("lightning_hivemind.strategy.HivemindStrategy.num_peers", new_callable=PropertyMock)
-def test_args_passed_to_optimizer(mock_peers):
+@pytest.mark.usefixtures("reuse_shared_dht")
+def test_args_passed_to_optimizer():
     """Test to ensure arguments are correctly passed to the hivemind optimizer wrapper."""
-    mock_peers.return_value = 1
     compression = hivemind.ScaledFloat16Compression()
-    with mock.patch("hivemind.Optimizer", wraps=hivemind.Optimizer) as mock_optimizer:
-
-        class TestModel(BoringModel):
-            def on_before_backward(self, loss: Tensor) -> None:
-                args, kwargs = mock_optimizer.call_args
-                mock_optimizer.assert_called()
-                arguments = {
-                    "delay_optimizer_step": True,
-                    "delay_state_averaging": True,
-                    "state_averaging_compression": compression,
-                    "grad_compression": compression,
-                    "offload_optimizer": True,
-                    "reuse_grad_buffers": True,
-                    "target_batch_size": 1,
-                }
-
-                for key, value in arguments.items():
-                    assert key in kwargs
-                    assert value == kwargs[key]
-
-        model = TestModel()
-        trainer = Trainer(
-            strategy=HivemindStrategy(
-                target_batch_size=1,
-                reuse_grad_buffers=True,
-                delay_state_averaging=True,
-                delay_optimizer_step=True,
-                offload_optimizer=True,
-                grad_compression=compression,
-                state_averaging_compression=compression,
-            ),
-            fast_dev_run=True,
-        )
-        trainer.fit(model)
-        # ensures that after training with `reuse_grad_buffers` we restore the hook
-        assert model.optimizer_zero_grad is not None
+    strategy = HivemindStrategy(
+        target_batch_size=1,
+        reuse_grad_buffers=True,
+        delay_state_averaging=True,
+        delay_optimizer_step=True,
+        offload_optimizer=True,
+        grad_compression=compression,
+        state_averaging_compression=compression,
+    )
+    model = BoringModel()
+    with mock.patch("hivemind.Optimizer") as mock_optimizer:
+        mock_optimizer.return_value = _make_fake_optimizer(torch.optim.SGD(model.parameters(), lr=0.1))
+        with _initialized_strategy(strategy, model):
+            mock_optimizer.assert_called()
+            args, kwargs = mock_optimizer.call_args
+            arguments = {
+                "delay_optimizer_step": True,
+                "delay_state_averaging": True,
+                "state_averaging_compression": compression,
+                "grad_compression": compression,
+                "offload_optimizer": True,
+                "reuse_grad_buffers": True,
+                "target_batch_size": 1,
+                "averager_opts": {"request_timeout": 1.0},
+            }
+
+            for key, value in arguments.items():
+                assert key in kwargs
+                assert value == kwargs[key]
+    # ensures that after training with `reuse_grad_buffers` we restore the hook
+    assert model.optimizer_zero_grad is not None
 
 
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
 @pytest.mark.parametrize(
     ("host_maddrs", "expected_maddrs"),
     [(None, ["/ip4/0.0.0.0/tcp/0", "/ip4/0.0.0.0/udp/0/quic"]), (["/ip4/127.0.0.1/tcp/0"], ["/ip4/127.0.0.1/tcp/0"])],
 )
-def test_maddrs(host_maddrs, expected_maddrs):
+@mock.patch("hivemind.DHT", spec=_DHTSpec)
+def test_maddrs(mock_dht, host_maddrs, expected_maddrs):
     """Test that the multiple addresses are correctly assigned."""
     strategy = HivemindStrategy(target_batch_size=1, host_maddrs=host_maddrs)
-    assert strategy.dht.kwargs["host_maddrs"] == expected_maddrs
-
+    assert strategy.dht is mock_dht.return_value
+    assert mock_dht.call_args.kwargs["host_maddrs"] == expected_maddrs
 
-def _run_collab_training_fn(initial_peers, wait_seconds, barrier, recorded_process_peers, recorded_process_steps):
-    recorded_peers = []
-    recorded_global_steps = []
-
-    class TestModel(BoringModel):
-        def on_train_batch_end(self, outputs: STEP_OUTPUT, batch: Any, batch_idx: int, unused: int = 0) -> None:
-            time.sleep(wait_seconds)  # add an additional delay to give processes time to sync
-            recorded_peers.append(self.trainer.strategy.num_peers)
-            recorded_global_steps.append(self.trainer.optimizers[0].local_epoch)
 
-        def on_train_end(self) -> None:
-            # wait for all processes to get to the end of training before teardown
-            barrier.wait()
-
-    model = TestModel()
-    trainer = Trainer(
-        max_epochs=1,
-        limit_train_batches=16,
-        limit_val_batches=0,
-        strategy=HivemindStrategy(
-            delay_state_averaging=True,
-            offload_optimizer=True,
-            delay_optimizer_step=True,
-            delay_grad_averaging=True,
-            target_batch_size=8,
-            initial_peers=initial_peers,
-            verbose=False,
-        ),
-    )
-    trainer.fit(model)
-
-    recorded_process_peers.append(recorded_peers)
-    recorded_process_steps.append(recorded_global_steps)
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [("127.0.0.1", True), ("::1", True), ("127.0.1.1", True), ("0.0.0.0", False), ("10.0.0.1", False)],
+)
+def test_is_loopback(host, expected):
+    assert _is_loopback(host) is expected
 
 
 # TODO: check why it fails with PT 1.12
 @pytest.mark.skip
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
 @pytest.mark.parametrize(
     ("num_processes", "wait_seconds"),
     [(2, 0.25)],
 )
-def test_multiple_peers(num_processes, wait_seconds):
+def test_multiple_peers(num_processes, wait_seconds, shared_dht):
     """Test to ensure that if we have two running processes with the same peers, they connect and train successfully."""
-    dht_root = hivemind.DHT(start=True)
-    barrier = mp.Barrier(num_processes)
-    initial_peers = dht_root.get_visible_maddrs()
+    import multiprocessing as mp
+
+    from _collab_worker import _run_collab_training_fn
 
-    with mp.Manager() as manager:
+    # the forkserver imports the heavy packages once, after which every worker process is a cheap fork of it
+    mp_context = mp.get_context("forkserver")
+    mp_context.set_forkserver_preload(["torch", "hivemind", PL_PACKAGE, "_collab_worker"])
+    barrier = mp_context.Barrier(num_processes)
+    initial_peers = shared_dht.get_visible_maddrs()
+
+    with mp_context.Manager() as manager:
         # allows processes to return their recorded logged peers/steps
         recorded_process_peers = manager.list()
         recorded_process_steps = manager.list()
         processes = [
-            mp.Process(
+            mp_context.Process(
                 target=_run_collab_training_fn,
                 kwargs={
                     "initial_peers": initial_peers,
+                    "num_processes": num_processes,
                     "wait_seconds": wait_seconds,
                     "barrier": barrier,
                     "recorded_process_peers": recorded_process_peers,
@@ -304,9 +385,9 @@ def test_multiple_peers(num_processes, wait_seconds):
             assert any(global_step > 0 for global_step in process_steps)
 
 
+@pytest.mark.usefixtures("reuse_shared_dht")
 @pytest.mark.xfail(AssertionError, reason="Trainer.precision_plugin.scaler is not hivemind.GradScaler")  # todo
-@pytest.mark.skipif(torch.cuda.device_count() < 1, reason="This test needs at least single GPU.")
-@mock.patch.dict(os.environ, {"HIVEMIND_MEMORY_SHARING_STRATEGY": "file_descriptor"}, clear=True)
+@pytest.mark.gpu
 def test_scaler_updated_precision_16():
     class TestModel(BoringModel):
         def on_fit_start(self) -> None:
@@ -314,12 +395,6 @@ def test_scaler_updated_precision_16():
             raise SystemExit
 
     model = TestModel()
-    trainer = Trainer(
-        strategy=HivemindStrategy(target_batch_size=1),
-        fast_dev_run=True,
-        precision=16,
-        accelerator="gpu",
-        devices=1,
-    )
+    trainer = _fast_trainer(HivemindStrategy(target_batch_size=1), precision=16, accelerator="gpu", devices=1)
     with pytest.raises(SystemExit):
         trainer.fit(model)